@@ -26,6 +26,7 @@ import apsw
 import dbver
 import libtorrent as lt
 
+from tvaf import concurrency
 from tvaf import ltpy
 
 _LOG = logging.getLogger(__name__)
@@ -131,14 +132,22 @@ def info_hashes(atp: lt.add_torrent_params) -> lt.info_hash_t:
 
 
 def resume_data(atp: lt.add_torrent_params) -> bytes:
-    if atp.ti is None:
+    ti = atp.ti
+    if ti is None:
         with ltpy.translate_exceptions():
             return lt.write_resume_data_buf(atp)
-    atp_copy = copy(atp)
-    atp_copy.info_hashes = atp.ti.info_hashes()
-    atp_copy.ti = None
-    with ltpy.translate_exceptions():
-        return lt.write_resume_data_buf(atp_copy)
+    # Detach the info section for the write and restore it after, rather than
+    # round-tripping a whole copy of atp through bencoding. Callers pass
+    # their own copy, so the temporary mutation isn't visible elsewhere
+    orig_info_hashes = atp.info_hashes
+    atp.info_hashes = ti.info_hashes()
+    atp.ti = None
+    try:
+        with ltpy.translate_exceptions():
+            return lt.write_resume_data_buf(atp)
+    finally:
+        atp.ti = ti
+        atp.info_hashes = orig_info_hashes
 
 
 def insert_or_ignore_resume_data(
@@ -233,7 +242,7 @@ async def write(
                 else:
                     jobs.append(await item)
             try:
-                await asyncio.to_thread(_apply, pool, jobs)
+                await concurrency.to_thread(_apply, pool, jobs)
             except apsw.BusyError:
                 _LOG.info("resumedb busy, will retry after 200ms")
                 await asyncio.sleep(0.2)
@@ -21,6 +21,7 @@ import anyio
 import asyncstdlib
 import libtorrent as lt
 
+from tvaf import concurrency
 from tvaf import ltpy
 
 
@@ -40,7 +41,7 @@ async def wait_pieces(
         nonlocal have_piece
         while True:
             with ltpy.translate_exceptions():
-                status = await asyncio.to_thread(get_status)
+                status = await concurrency.to_thread(get_status)
             prev_have_piece = have_piece
             have_piece = status.pieces
             if have_piece and not prev_have_piece:
@@ -12,7 +12,9 @@
 # PERFORMANCE OF THIS SOFTWARE.
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Awaitable
+from collections.abc import Hashable
 import functools
 from typing import Any
 from typing import Callable
@@ -22,6 +24,8 @@ from typing import TypeVar
 
 import asyncstdlib
 
+from . import concurrency
+
 _C = TypeVar("_C", bound=Callable[..., Any])
 _CA = TypeVar("_CA", bound=Callable[..., Awaitable])
 
@@ -63,6 +67,46 @@ def asingleton() -> Callable[[_CA], _LRUCacheWrapper[_CA]]:
     return alru_cache(maxsize=1)
 
 
+_KWARGS_MARK = object()
+
+
+def _make_key(args: tuple, kwargs: dict[str, Any]) -> Hashable:
+    if not kwargs:
+        return args
+    return (*args, _KWARGS_MARK, *sorted(kwargs.items()))
+
+
+def singleflight() -> Callable[[_CA], _CA]:
+    # Concurrent calls with the same arguments share one in-flight call. The
+    # result is not kept once the call completes, so this dedups work without
+    # holding onto (possibly large or stale) results like alru_cache does.
+    def wrapper(func: _CA) -> _CA:
+        in_flight: dict[Hashable, asyncio.Future] = {}
+
+        @functools.wraps(func)
+        async def wrapped(*args: Any, **kwargs: Any) -> Any:
+            key = _make_key(args, kwargs)
+            future = in_flight.get(key)
+            if future is None:
+                future = concurrency.ensure_future(func(*args, **kwargs))
+                in_flight[key] = future
+
+                def evict(done: asyncio.Future) -> None:
+                    if in_flight.get(key) is done:
+                        del in_flight[key]
+                    # Mark as retrieved, in case every caller was cancelled
+                    if not done.cancelled():
+                        done.exception()
+
+                future.add_done_callback(evict)
+            # One caller being cancelled shouldn't cancel the call for others
+            return await asyncio.shield(future)
+
+        return cast(_CA, wrapped)
+
+    return wrapper
+
+
 def add_clear_callback(callback: Callable[[], Any]) -> None:
     _callbacks.append(callback)
 
@@ -16,17 +16,36 @@ from __future__ import annotations
 import asyncio
 from collections.abc import AsyncIterator
 from collections.abc import Awaitable
+from collections.abc import Collection
 from collections.abc import Iterable
 from collections.abc import Iterator
+import concurrent.futures
+import contextvars
+import functools
 import inspect
 import itertools
+import multiprocessing
+import os
+import time
 from typing import Any
+from typing import Callable
+from typing import cast
+from typing import Optional
 from typing import TypeVar
 
 _T = TypeVar("_T")
 
 
-async def iter_in_thread(iterator: Iterator[_T], batch_size=100) -> AsyncIterator[_T]:
+# Bounds for adaptive batch sizing in iter_in_thread()
+_ADAPTIVE_INITIAL_BATCH_SIZE = 100
+_ADAPTIVE_MAX_BATCH_SIZE = 10000
+_ADAPTIVE_FAST_BATCH_SECONDS = 0.002
+_ADAPTIVE_SLOW_BATCH_SECONDS = 0.02
+
+
+async def iter_in_thread(
+    iterator: Iterator[_T], batch_size: Optional[int] = 100
+) -> AsyncIterator[_T]:
     """Runs a synchronous Iterator in a thread, in batches.
 
     This turns an Iterator into an AsyncIterator. To reduce context switching,
@@ -35,6 +54,10 @@ async def iter_in_thread(iterator: Iterator[_T], batch_size=100) -> AsyncIterato
     Choose batch_size with care. If reading large files, use a small
     batch_size. If extracting rows from sqlite, use a large batch_size.
 
+    If batch_size is None, the batch size is adapted to the speed of the
+    iterator: it's doubled (up to 10000) when a full batch takes less than 2ms
+    to extract, and halved (down to 1) when a batch takes more than 20ms.
+
     Batching means that the caller may be artifically delayed from seeing an
     object from the iterator. Don't use this if timely handling of each object
     is important.
@@ -42,27 +65,193 @@ async def iter_in_thread(iterator: Iterator[_T], batch_size=100) -> AsyncIterato
     Args:
         iterator: A synchronous Iterator to run in a thread.
         batch_size: The maximum number of objects to retrieve from the iterator
-            in the thread, before yielding them.
+            in the thread, before yielding them, or None to choose
+            automatically.
 
     Yields:
         Objects from the input iterator.
     """
+    adaptive = batch_size is None
+    size = _ADAPTIVE_INITIAL_BATCH_SIZE if batch_size is None else batch_size
 
-    def iter_batch() -> list[_T]:
-        return list(itertools.islice(iterator, batch_size))
+    # Time the extraction in the worker, so executor queueing delay isn't
+    # mistaken for a slow iterator
+    def iter_batch() -> tuple[list[_T], float]:
+        start = time.monotonic()
+        batch = list(itertools.islice(iterator, size))
+        return batch, time.monotonic() - start
 
     while True:
-        batch = await asyncio.to_thread(iter_batch)
+        batch, elapsed = await to_thread(iter_batch)
         if not batch:
             break
+        if adaptive:
+            if elapsed < _ADAPTIVE_FAST_BATCH_SECONDS and len(batch) == size:
+                size = min(size * 2, _ADAPTIVE_MAX_BATCH_SIZE)
+            elif elapsed > _ADAPTIVE_SLOW_BATCH_SECONDS:
+                size = max(size // 2, 1)
         for obj in batch:
             yield obj
 
 
+async def to_thread(
+    func: Callable[..., _T],
+    /,
+    *args: Any,
+    executor: Optional[concurrent.futures.Executor] = None,
+    **kwargs: Any,
+) -> _T:
+    """Runs a function in an executor.
+
+    This is equivalent to asyncio.to_thread(), including propagation of
+    contextvars, but avoids allocating a functools.partial for the common case
+    of a call with only positional arguments.
+
+    Use this for blocking I/O, including calls into libtorrent and sqlite. Use
+    to_process() for CPU-bound work that doesn't release the GIL.
+
+    Args:
+        func: The function to call.
+        args: Positional arguments to func.
+        executor: The executor to run func in. If None, tvaf's thread pool
+            is used if started (see start_thread_pool()), otherwise the event
+            loop's default executor.
+        kwargs: Keyword arguments to func.
+
+    Returns:
+        The return value of func.
+    """
+    if executor is None:
+        executor = _thread_pool
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    if kwargs:
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await loop.run_in_executor(executor, cast(Callable[[], _T], call))
+    return await loop.run_in_executor(executor, context.run, func, *args)
+
+
+async def to_thread_nocontext(
+    func: Callable[..., _T],
+    /,
+    *args: Any,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> _T:
+    """Runs a function in an executor, without copying contextvars.
+
+    This is like to_thread(), but skips copying the current context into the
+    worker thread. Use it for plain I/O calls which don't read any contextvars.
+
+    Args:
+        func: The function to call.
+        args: Positional arguments to func.
+        executor: The executor to run func in. If None, the same as for
+            to_thread().
+
+    Returns:
+        The return value of func.
+    """
+    if executor is None:
+        executor = _thread_pool
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def to_process(func: Callable[..., _T], /, *args: Any) -> _T:
+    """Runs a function in a shared process pool.
+
+    This is for CPU-bound work, which would otherwise hold the GIL and stall
+    the event loop and all other threads. The function and its arguments and
+    return value must be picklable.
+
+    The process pool is created on first use, and uses the "spawn" start
+    method, as forking a process that runs libtorrent is not safe. Starting
+    workers is expensive, so this is only worthwhile for large jobs.
+
+    Args:
+        func: The function to call. Must be picklable.
+        args: Positional arguments to func. Must be picklable.
+
+    Returns:
+        The return value of func.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_process_pool(), func, *args
+    )
+
+
+def create_thread_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Creates a thread pool suitable for tvaf's blocking calls.
+
+    Python's default executor has min(32, os.cpu_count() + 4) workers. Most of
+    our threaded calls block on libtorrent or sqlite rather than the CPU, so we
+    size the pool more generously, but keep the same upper bound.
+
+    Returns:
+        A new ThreadPoolExecutor.
+    """
+    return concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(32, (os.cpu_count() or 1) * 5), thread_name_prefix="tvaf"
+    )
+
+
+# We keep our own pool rather than replacing the event loop's default
+# executor, so we never orphan a default executor that was already in use, and
+# we can shut down exactly the pool we created
+_thread_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def start_thread_pool() -> None:
+    """Creates the thread pool used by to_thread() and to_thread_nocontext().
+
+    Until this is called, and again after shutdown_thread_pool(), they use the
+    event loop's default executor. Does nothing if the pool is already started.
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = create_thread_pool()
+
+
+def shutdown_thread_pool() -> None:
+    """Shuts down the thread pool from start_thread_pool(), if it was started.
+
+    Pending jobs are cancelled. This doesn't wait for running jobs, so it's
+    safe to call from the event loop; their workers exit when they finish.
+    """
+    global _thread_pool
+    if _thread_pool is not None:
+        pool, _thread_pool = _thread_pool, None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+_process_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = concurrent.futures.ProcessPoolExecutor(
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Shuts down the process pool used by to_process(), if it was created.
+
+    Pending jobs are cancelled. This blocks until running jobs finish and the
+    worker processes exit.
+    """
+    global _process_pool
+    if _process_pool is not None:
+        pool, _process_pool = _process_pool, None
+        pool.shutdown(cancel_futures=True)
+
+
 async def wait_first(aws: Iterable[Awaitable]) -> None:
     """Wait for the first task to complete, and cancel the others.
 
-    All awaitables will be done after wait_first finishes.
+    All awaitables will be done after wait_first finishes. Cancelled tasks are
+    awaited, so any cleanup they do will have finished too.
 
     Args:
         aws: Tasks to wait for.
@@ -71,17 +260,33 @@ async def wait_first(aws: Iterable[Awaitable]) -> None:
         Any exceptions raised by the first completed task, including
         asyncio.CancelledError.
     """
+    # ensure_future() passes through existing futures, so we only create tasks
+    # for bare coroutines and other awaitables
     tasks = [ensure_future(aw) for aw in aws]
     try:
         (done, pending) = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
     except asyncio.CancelledError:
-        for task in tasks:
-            task.cancel()
+        await _cancel_and_drain(tasks)
         raise
-    for task in pending:
-        task.cancel()
+    await _cancel_and_drain(pending)
+    # Several tasks may finish in the same step. Retrieve every exception, so
+    # asyncio doesn't log the ones we don't raise as never retrieved
+    first_failed: Optional[asyncio.Future] = None
     for task in done:
-        task.result()
+        if task.cancelled() or task.exception() is not None:
+            if first_failed is None:
+                first_failed = task
+    if first_failed is not None:
+        first_failed.result()
+
+
+async def _cancel_and_drain(tasks: Collection[asyncio.Future]) -> None:
+    # Cancel everything at once, then wait for all cancellations together, so
+    # no task outlives the caller
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 
 class RefCount:
@@ -87,6 +87,8 @@ from typing import Optional
 from typing import TypeVar
 from typing import Union
 
+from . import concurrency
+
 # Design notes:
 
 # Config is stored as json. This is so external programs can easily manipulate
@@ -126,6 +128,8 @@ class InvalidConfigError(Error):
 
 _T = TypeVar("_T")
 
+_MISSING: Any = object()
+
 
 class Config(dict, MutableMapping[str, Any]):
     """A json-compatible dict."""
@@ -145,10 +149,16 @@ class Config(dict, MutableMapping[str, Any]):
         Raises:
             InvalidConfigError: If the file contains invalid JSON.
         """
-        path = pathlib.Path(path)
-        contents = await asyncio.to_thread(path.read_text)
+        path_: pathlib.Path = pathlib.Path(path)
+
+        # Read and parse in one step in the thread, so only the parsed object
+        # comes back to the event loop
+        def load() -> Any:
+            with path_.open(mode="rb") as fp:
+                return json.load(fp)
+
         try:
-            data = json.loads(contents)
+            data = await concurrency.to_thread_nocontext(load)
         except json.JSONDecodeError as exc:
             raise InvalidConfigError(str(exc)) from exc
         return cls(data)
@@ -163,11 +173,14 @@ class Config(dict, MutableMapping[str, Any]):
         """
         path = pathlib.Path(path)
         contents = json.dumps(self, sort_keys=True, indent=4)
-        await asyncio.to_thread(path.write_text, contents)
+        await concurrency.to_thread_nocontext(path.write_text, contents)
 
     def _get(self, key: str, type_: type[_T]) -> Optional[_T]:
-        value = self.get(key)
-        if key in self and not isinstance(value, type_):
+        # Single lookup; a present-but-None value is still invalid
+        value = dict.get(self, key, _MISSING)
+        if value is _MISSING:
+            return None
+        if not isinstance(value, type_):
             raise InvalidConfigError(f'"{key}": {value!r} is not a {type_}')
         return value
 
@@ -270,7 +283,9 @@ _C = TypeVar("_C", bound=Config)
 
 @contextlib.asynccontextmanager
 async def stage_config(
-    config: Config, *stages: Callable[[Config], AsyncContextManager]
+    config: Config,
+    *stages: Callable[[Config], AsyncContextManager],
+    parallel: bool = False,
 ) -> AsyncIterator[None]:
     """Applies a new Config to a sequence of stage functions.
 
@@ -283,18 +298,46 @@ async def stage_config(
     Any exceptions in later stage functions will be propagated via __aexit__ to
     earlier ones.
 
+    If parallel is True, all the __aenter__ calls run concurrently. This is
+    only suitable for stage functions which are independent of each other, and
+    don't depend on being entered in order (for example, don't use this with a
+    stage which acquires a lock for the others). If any __aenter__ fails, the
+    others are cancelled, and the stages which were entered successfully get
+    the exception via __aexit__, in reverse order, as in the serial case.
+
     stage_config returns an async context manager. stage_config really just
     "chains" several stage functions into a single stage function.
 
     Args:
         config: The new config to apply.
         stages: A list of stage functions to receive the new config.
+        parallel: Whether to __aenter__ all stages concurrently.
 
     Returns:
         An overall context manager which represents applying the config to all
         the given stages.
     """
     async with contextlib.AsyncExitStack() as stack:
-        for stage in stages:
-            await stack.enter_async_context(stage(config))
+        if parallel:
+            await _enter_parallel(stack, [stage(config) for stage in stages])
+        else:
+            for stage in stages:
+                await stack.enter_async_context(stage(config))
         yield
+
+
+async def _enter_parallel(
+    stack: contextlib.AsyncExitStack, ctxs: list[AsyncContextManager]
+) -> None:
+    entries = [concurrency.ensure_future(ctx.__aenter__()) for ctx in ctxs]
+    try:
+        await asyncio.gather(*entries)
+    finally:
+        # On failure, stop any stages still entering, then register exits for
+        # the ones which made it, in stage order
+        for entry in entries:
+            entry.cancel()
+        await asyncio.gather(*entries, return_exceptions=True)
+        for ctx, entry in zip(ctxs, entries):
+            if not entry.cancelled() and entry.exception() is None:
+                stack.push_async_exit(ctx)
@@ -13,12 +13,11 @@
 from __future__ import annotations
 
 import base64
+import binascii
 from collections.abc import Iterator
 from collections.abc import Sequence
 import datetime
 import enum
-import functools
-import operator
 import re
 from typing import Any
 from typing import Callable
@@ -61,8 +60,13 @@ def optional_error_code(ec: Optional[ErrorCode]) -> Optional[ErrorCode]:
     return ec
 
 
+class _TrustedHex(str):
+    """A hex digest produced by libtorrent, which needs no further checks."""
+
+
 class Sha1Hash(pydantic.ConstrainedStr):
-    to_lower = True
+    # Lowercasing happens in validate(), so trusted values can skip it
+    to_lower = False
     min_length = 40
     max_length = 40
     regex = re.compile(r"^[a-f0-9]{40}$")
@@ -75,12 +79,19 @@ class Sha1Hash(pydantic.ConstrainedStr):
     @classmethod
     def validate_orm(cls, value: Any) -> Any:
         if isinstance(value, lt.sha1_hash):
-            return str(value)
+            return _TrustedHex(value)
         return value
 
+    @classmethod
+    def validate(cls, value: str) -> str:
+        if isinstance(value, _TrustedHex):
+            return str(value)
+        return super().validate(value.lower())
+
 
 class Sha256Hash(pydantic.ConstrainedStr):
-    to_lower = True
+    # Lowercasing happens in validate(), so trusted values can skip it
+    to_lower = False
     min_length = 64
     max_length = 64
     regex = re.compile(r"^[a-f0-9]{64}$")
@@ -93,18 +104,28 @@ class Sha256Hash(pydantic.ConstrainedStr):
     @classmethod
     def validate_orm(cls, value: Any) -> Any:
         if isinstance(value, lt.sha256_hash):
-            return str(value)
+            return _TrustedHex(value)
         return value
 
+    @classmethod
+    def validate(cls, value: str) -> str:
+        if isinstance(value, _TrustedHex):
+            return str(value)
+        return super().validate(value.lower())
+
+
+_ZERO_SHA1 = "0" * 40
+_ZERO_SHA256 = "0" * 64
+
 
 def optional_sha1(sha1: Optional[Sha1Hash]) -> Optional[Sha1Hash]:
-    if sha1 == "0" * 40:
+    if sha1 == _ZERO_SHA1:
         return None
     return sha1
 
 
 def optional_sha256(sha256: Optional[Sha256Hash]) -> Optional[Sha256Hash]:
-    if sha256 == "0" * 64:
+    if sha256 == _ZERO_SHA256:
         return None
     return sha256
 
@@ -138,6 +159,15 @@ class Base64(pydantic.ConstrainedBytes):
         return value
 
 
+_TORRENT_STATE_NAMES: dict[int, str] = {
+    int(k): v.name for k, v in lt.torrent_status.states.values.items()  # type: ignore
+}
+# Strip the "storage_mode_" prefix
+_STORAGE_MODE_NAMES: dict[int, str] = {
+    int(k): v.name[13:] for k, v in lt.storage_mode_t.values.items()  # type: ignore
+}
+
+
 class TorrentState(enum.Enum):
     CHECKING_FILES = "checking_files"
     DOWNLOADING_METADATA = "downloading_metadata"
@@ -153,7 +183,7 @@ class TorrentState(enum.Enum):
     @classmethod
     def _from_lt(cls, value: Any) -> Any:
         if isinstance(value, int):
-            return lt.torrent_status.states.values[value].name  # type: ignore
+            return _TORRENT_STATE_NAMES[value]
         return value
 
 
@@ -168,16 +198,22 @@ class StorageMode(enum.Enum):
     @classmethod
     def _from_lt(cls, value: Any) -> Any:
         if isinstance(value, int):
-            return lt.storage_mode_t.values[value].name[13:]  # type: ignore
+            return _STORAGE_MODE_NAMES[value]
         return value
 
 
 def _seq_to_bitfield(seq: Sequence) -> bytes:
-    offsets = range(0, len(seq), 8)
-    splits = (seq[ofs : ofs + 8] for ofs in offsets)
-    enums = (enumerate(spl) for spl in splits)
-    bit_splits = ((0x80 >> i if e else 0 for i, e in enum) for enum in enums)
-    return bytes(functools.reduce(operator.__or__, b, 0) for b in bit_splits)
+    if not seq:
+        return b""
+    # Fresh and fully-downloaded torrents are the common case
+    if not any(seq):
+        return bytes((len(seq) + 7) // 8)
+    if all(seq):
+        full, rem = divmod(len(seq), 8)
+        return b"\xff" * full + (bytes(((0xFF00 >> rem) & 0xFF,)) if rem else b"")
+    # Parse the whole bitfield as one int, padded out to a byte boundary
+    bits = "".join(["1" if e else "0" for e in seq]) + "0" * (-len(seq) % 8)
+    return int(bits, 2).to_bytes(len(bits) // 8, "big")
 
 
 def _convert_pieces(value: Any) -> Any:
@@ -185,9 +221,21 @@ def _convert_pieces(value: Any) -> Any:
         return None
     if isinstance(value, (list, tuple)):
         return _seq_to_bitfield(value)
+    # Already packed, such as when copying another TorrentStatus
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value) or None
     raise TypeError()
 
 
+class _Pieces(Base64):
+    @classmethod
+    def __get_validators__(cls) -> CallableGenerator:
+        # Built from libtorrent's list of bools, or from an already-packed
+        # bytes, bytearray or memoryview. _convert_pieces fully validates
+        # both, and rejects anything else
+        yield _convert_pieces
+
+
 class TorrentStatus(BaseModel):
     active_duration: datetime.timedelta
     added_time: int
@@ -232,7 +280,7 @@ class TorrentStatus(BaseModel):
     num_pieces: int
     num_seeds: int
     num_uploads: int
-    pieces: Optional[Base64]
+    pieces: Optional[_Pieces]
     progress: float
     progress_ppm: int
     queue_position: int
@@ -255,15 +303,10 @@ class TorrentStatus(BaseModel):
     upload_payload_rate: int
     upload_rate: int
     uploads_limit: int
-    verified_pieces: Optional[Base64]
+    verified_pieces: Optional[_Pieces]
 
     _errc = pydantic.validator("errc", allow_reuse=True)(optional_error_code)
 
-    _pieces = pydantic.validator("pieces", pre=True, allow_reuse=True)(_convert_pieces)
-    _verified_pieces = pydantic.validator(
-        "verified_pieces", pre=True, allow_reuse=True
-    )(_convert_pieces)
-
     class Config:
         orm_mode = True
 
@@ -303,7 +346,8 @@ class HexBase(bytes):
                 raise pydantic.AnyStrMaxLengthError(limit_value=length)
             if not cls.regex.match(value):
                 raise pydantic.StrRegexError(pattern=cls.regex.pattern)
-            return bytes.fromhex(value)
+            # Already validated, so skip fromhex()'s whitespace handling
+            return binascii.a2b_hex(value)
         raise pydantic.BytesError()
 
 
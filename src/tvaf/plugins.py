@@ -17,6 +17,7 @@ from collections.abc import Iterable
 from collections.abc import Mapping
 import importlib.metadata
 import sys
+import types
 from typing import Any
 from typing import Callable
 from typing import Generic
@@ -30,12 +31,18 @@ def _entry_point_key(entry: importlib.metadata.EntryPoint) -> tuple:
     return (entry.name, entry.value)
 
 
-def _select_eps_group(
-    group_name: str,
-) -> Iterable[importlib.metadata.EntryPoint]:
-    if sys.version_info >= (3, 10):
+if sys.version_info >= (3, 10):
+
+    def _select_eps_group(
+        group_name: str,
+    ) -> Iterable[importlib.metadata.EntryPoint]:
         return importlib.metadata.entry_points(group=group_name)
-    else:
+
+else:
+
+    def _select_eps_group(
+        group_name: str,
+    ) -> Iterable[importlib.metadata.EntryPoint]:
         eps = importlib.metadata.entry_points()
         return eps.get(group_name, ())
 
@@ -53,7 +60,11 @@ def get(group_name: str) -> Mapping[str, Any]:
                 f"{entry_point.value} != {existing.value}"
             )
         name_to_entry_point[name] = entry_point
-    return {name: ep.load() for name, ep in name_to_entry_point.items()}
+    # Callers run plugins in name order, so sort once here rather than on
+    # every call. The result is cached, so it must not be mutable.
+    return types.MappingProxyType(
+        {name: name_to_entry_point[name].load() for name in sorted(name_to_entry_point)}
+    )
 
 
 _T = TypeVar("_T")
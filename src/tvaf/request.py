@@ -15,7 +15,6 @@
 from __future__ import annotations
 
 import asyncio
-import collections
 from collections.abc import AsyncGenerator
 from collections.abc import MutableMapping
 from collections.abc import Sequence
@@ -76,50 +75,62 @@ _LOG = logging.getLogger(__name__)
 class _State:
     SEQ_BUFFER = 30
 
+    # __weakref__ is needed for RequestService._states
+    __slots__ = (
+        "_handle",
+        "_session",
+        "_reads",
+        "_readers",
+        "_prev_time_critical",
+        "_prioritize_pending",
+        "_checked",
+        "_loop",
+        "_exc",
+        "__weakref__",
+    )
+
     def __init__(self, handle: lt.torrent_handle, session: lt.session):
         self._handle = handle
         self._session = session
-        # OrderdDict to preserve FIFO order for prioritizing requests
-        self._reads: dict[int, asyncio.Future[bytes]] = collections.OrderedDict()
+        # Insertion order is FIFO order for prioritizing requests
+        self._reads: dict[int, asyncio.Future[bytes]] = {}
         self._readers: dict[int, int] = {}
         self._prev_time_critical: set[int] = set()
-        self._exc = asyncio.get_event_loop().create_future()
-
-    def _delta_reads(self, prev: set[int], cur: set[int]) -> None:
-        prioritize = False
-        # Increment refcount for each new reading piece
-        for piece in cur - prev:
-            self._readers[piece] = self._readers.get(piece, 0) + 1
-            if piece not in self._reads:
-                self._reads[piece] = asyncio.get_event_loop().create_future()
-                prioritize = True
-        # Decrement refcount for each old reading piece
-        for piece in prev - cur:
-            self._readers[piece] -= 1
-            assert self._readers[piece] >= 0
-            if self._readers[piece] == 0:
-                self._readers.pop(piece)
-                future = self._reads.pop(piece)
-                if not future.done():
-                    prioritize = True
-                else:
-                    # mark as retrieved
-                    future.exception()
-        if prioritize:
-            self.prioritize()
+        self._prioritize_pending = False
+        self._checked = False
+        self._loop = asyncio.get_event_loop()
+        self._exc = self._loop.create_future()
+
+    def _inc_read(self, piece: int) -> None:
+        self._readers[piece] = self._readers.get(piece, 0) + 1
+        if piece not in self._reads:
+            self._reads[piece] = self._loop.create_future()
+            self.prioritize_soon()
+
+    def _dec_read(self, piece: int) -> None:
+        count = self._readers[piece] - 1
+        assert count >= 0
+        if count:
+            self._readers[piece] = count
+            return
+        del self._readers[piece]
+        future = self._reads.pop(piece)
+        if not future.done():
+            self.prioritize_soon()
+        else:
+            # mark as retrieved
+            future.exception()
 
     # NB: This is a "naive" AsyncGenerator; pieces are prioritized in the
     # "setup" (first __anext__() call) and deprioritized in a finally clause.
     # This means that order of priorities between two read_pieces() calls is a
     # race, and deprioritization may be delayed until gc.
     async def read_pieces(self, pieces: Sequence[int]) -> AsyncGenerator[bytes, None]:
-        async def check() -> None:
-            if not await asyncio.to_thread(
-                ltpy.handle_in_session, self._handle, self._session
-            ):
-                self.set_exception(ltpy.InvalidTorrentHandleError.create())
-
-        asyncio.create_task(check())
+        # The handle only needs checking once per _State: after this, removal
+        # is reported to us via torrent_removed_alert
+        if not self._checked:
+            self._checked = True
+            asyncio.create_task(self._check())
 
         # Do some once-per-stream setup
         with ltpy.translate_exceptions():
@@ -139,35 +150,63 @@ class _State:
         # function, but that had to be synchronous to preserve order for
         # prioritization, and complex call usage is required to avoid holding
         # memory for the lifetime of a request
-        prev_reading: set[int] = set()
+        # Multiplicity of each piece in our window of the next N pieces. Each
+        # step slides the window by one, so only update the pieces at its ends
+        window: dict[int, int] = {}
+
+        def enter(piece: int) -> None:
+            count = window.get(piece, 0)
+            window[piece] = count + 1
+            if not count:
+                self._inc_read(piece)
+
+        def leave(piece: int) -> None:
+            count = window[piece] - 1
+            if count:
+                window[piece] = count
+            else:
+                del window[piece]
+                self._dec_read(piece)
 
         try:
+            for piece in pieces[: self.SEQ_BUFFER]:
+                enter(piece)
             for i, piece in enumerate(pieces):
-                # Mark the next N pieces as reading
-                reading = set(pieces[i : i + self.SEQ_BUFFER])
-                self._delta_reads(prev_reading, reading)
-                prev_reading = reading
+                if i:
+                    # Enter before leaving, so a piece in both stays reading
+                    if i + self.SEQ_BUFFER - 1 < len(pieces):
+                        enter(pieces[i + self.SEQ_BUFFER - 1])
+                    leave(pieces[i - 1])
 
                 # Wait for the next piece to be read
                 read = self._reads[piece]
                 if read.done():
                     yield read.result()
                 else:
-                    start = asyncio.get_event_loop().time()
+                    start = self._loop.time()
                     await concurrency.wait_first(
                         (asyncio.shield(read), asyncio.shield(self._exc))
                     )
                     piece_data = read.result()
-                    elapsed = asyncio.get_event_loop().time() - start
-                    _LOG.debug(
-                        "%s piece %d: waited %dms",
-                        str(self._handle.info_hash()),
-                        piece,
-                        int(elapsed * 1000),
-                    )
+                    # Avoid info_hash() per piece when not logging
+                    if _LOG.isEnabledFor(logging.DEBUG):
+                        elapsed = self._loop.time() - start
+                        _LOG.debug(
+                            "%s piece %d: waited %dms",
+                            str(self._handle.info_hash()),
+                            piece,
+                            int(elapsed * 1000),
+                        )
                     yield piece_data
         finally:
-            self._delta_reads(prev_reading, set())
+            for piece in window:
+                self._dec_read(piece)
+
+    async def _check(self) -> None:
+        if not await concurrency.to_thread(
+            ltpy.handle_in_session, self._handle, self._session
+        ):
+            self.set_exception(ltpy.InvalidTorrentHandleError.create())
 
     def prioritize(self) -> None:
         try:
@@ -177,16 +216,37 @@ class _State:
             self.set_exception(exc)
 
     def _prioritize_inner(self) -> None:
-        time_critical = set(self._reads)
-
-        for piece in time_critical - self._prev_time_critical:
+        time_critical = self._reads.keys()
+        # Common after a canceled read: nothing to change
+        if time_critical == self._prev_time_critical:
+            return
+
+        # Walk _reads in insertion order, and give each new piece a slightly
+        # later deadline, so libtorrent fetches them in stream order rather
+        # than set order. Deadlines are relative to now, so they don't drift
+        prev = self._prev_time_critical
+        added = (piece for piece in time_critical if piece not in prev)
+        for deadline, piece in enumerate(added):
             self._handle.set_piece_deadline(
-                piece, 0, flags=lt.deadline_flags_t.alert_when_available
+                piece, deadline, flags=lt.deadline_flags_t.alert_when_available
             )
         for piece in self._prev_time_critical - time_critical:
             self._handle.reset_piece_deadline(piece)
 
-        self._prev_time_critical = time_critical
+        self._prev_time_critical = set(time_critical)
+
+    def prioritize_soon(self) -> None:
+        # Coalesces reprioritization within one event loop iteration, such as
+        # for a batch of alerts or several readers starting at once. Read
+        # futures are created synchronously, so any read_piece_alert fired
+        # by the deferred set_piece_deadline() still finds its future
+        if not self._prioritize_pending:
+            self._prioritize_pending = True
+            self._loop.call_soon(self._prioritize_deferred)
+
+    def _prioritize_deferred(self) -> None:
+        self._prioritize_pending = False
+        self.prioritize()
 
     def set_exception(self, exc: BaseException):
         if not self._exc.done():
@@ -202,7 +262,7 @@ class _State:
             exc = ltpy.exception_from_error_code(alert.error)
             if exc:
                 if isinstance(exc, ltpy.CanceledError):
-                    self.prioritize()
+                    self.prioritize_soon()
                 else:
                     future.set_exception(exc)
             else:
@@ -223,7 +283,7 @@ class _State:
     async def _maybe_dht_announce(self) -> None:
         with contextlib.suppress(ltpy.InvalidTorrentHandleError):
             with ltpy.translate_exceptions():
-                status = await asyncio.to_thread(self._handle.status)
+                status = await concurrency.to_thread(self._handle.status)
                 if status.num_peers == 0:
                     self._handle.force_dht_announce()
 
@@ -13,7 +13,9 @@
 from __future__ import annotations
 
 import asyncio
+import collections
 from collections.abc import Iterator
+from collections.abc import Sequence
 import contextlib
 import functools
 import logging
@@ -42,11 +44,32 @@ __all__ = ["ResumeService", "get_version", "upgrade", "iter_resume_data_from_db"
 _LOG = logging.getLogger(__name__)
 
 
+def _filter_need_save_resume_data(
+    handles: Sequence[lt.torrent_handle],
+) -> list[lt.torrent_handle]:
+    result: list[lt.torrent_handle] = []
+    for handle in handles:
+        with contextlib.suppress(ltpy.InvalidTorrentHandleError):
+            with ltpy.translate_exceptions():
+                # DOES block
+                if handle.need_save_resume_data():
+                    result.append(handle)
+    return result
+
+
+def _count_moving_storage(handles: Sequence[lt.torrent_handle]) -> int:
+    # moving_storage is always filled in, so skip the expensive fields
+    # DOES block
+    return sum(handle.status(flags=0).moving_storage for handle in handles)
+
+
 class ResumeService:
     """ResumeService owns resume data management."""
 
     SAVE_ALL_INTERVAL = math.tan(1.5657)  # ~196
-    TIMEOUT = 10
+    TIMEOUT: float = 10
+    # Number of handles to query per executor job
+    HANDLE_BATCH_SIZE = 64
 
     def __init__(
         self,
@@ -59,7 +82,15 @@ class ResumeService:
         self._pool = pool
         self._queue: resumedb.Queue = asyncio.Queue()
         self._alert_driver = alert_driver
-        self._got_alert = asyncio.Event()
+        # Count of our save_resume_data() calls per handle, whose alerts we
+        # haven't seen yet
+        self._pending_saves: collections.Counter[
+            lt.torrent_handle
+        ] = collections.Counter()
+        self._no_pending_saves = asyncio.Event()
+        self._no_pending_saves.set()
+        # Set once we're subscribed to alerts (or failed to subscribe)
+        self._subscribed = asyncio.Event()
 
         self._closed = concurrency.create_future()
         self._task: Optional[asyncio.Task] = None
@@ -70,16 +101,23 @@ class ResumeService:
                 yield from iter_resume_data_from_db(conn)
 
         async with asyncstdlib.scoped_iter(
-            concurrency.iter_in_thread(iter_atps())
+            concurrency.iter_in_thread(iter_atps(), batch_size=None)
         ) as async_iter:
             async for atp in async_iter:
                 # Does not block
                 self._session.async_add_torrent(atp)
 
     async def _handle_alerts(self) -> None:
+        try:
+            await self._iter_alerts()
+        finally:
+            self._subscribed.set()
+
+    async def _iter_alerts(self) -> None:
         async with self._alert_driver.iter_alerts(
             lt.alert_category.status | lt.alert_category.storage,
             lt.save_resume_data_alert,
+            lt.save_resume_data_failed_alert,
             lt.add_torrent_alert,
             lt.torrent_removed_alert,
             lt.metadata_received_alert,
@@ -89,12 +127,12 @@ class ResumeService:
             lt.torrent_paused_alert,
             lt.torrent_finished_alert,
         ) as iterator:
+            self._subscribed.set()
             async for alert in iterator:
                 with contextlib.suppress(ltpy.InvalidTorrentHandleError):
                     self._handle_alert(alert)
 
     def _handle_alert(self, alert: lt.alert) -> None:
-        self._got_alert.set()
         # NB: torrent_removed_alert may be followed by other alerts for the
         # same handle, and the handle may still be valid. We must avoid writing
         # data for deleted torrents, but we don't persist per-handle state to
@@ -109,6 +147,9 @@ class ResumeService:
             self._add(resumedb.update_resume_data, resumedb.copy(alert.params))
             if alert.params.ti is not None:
                 self._add(resumedb.update_info, alert.params.ti)
+            self._save_done(alert.handle)
+        elif isinstance(alert, lt.save_resume_data_failed_alert):
+            self._save_done(alert.handle)
         elif isinstance(alert, lt.add_torrent_alert):
             if alert.error.value():
                 return
@@ -123,6 +164,7 @@ class ResumeService:
                 self._add(resumedb.update_info, alert.params.ti)
         elif isinstance(alert, lt.torrent_removed_alert):
             self._add(resumedb.delete, alert.info_hashes)
+            self._saves_abandoned(alert.handle)
         elif isinstance(alert, lt.metadata_received_alert):
             self._metadata_received(alert.handle)
         elif isinstance(
@@ -138,8 +180,8 @@ class ResumeService:
             with contextlib.suppress(ltpy.InvalidTorrentHandleError):
                 with ltpy.translate_exceptions():
                     # Does not block
-                    alert.handle.save_resume_data(
-                        flags=lt.save_resume_flags_t.only_if_modified
+                    self._save_resume_data(
+                        alert.handle, flags=lt.save_resume_flags_t.only_if_modified
                     )
 
     def _metadata_received(self, handle: lt.torrent_handle) -> None:
@@ -153,14 +195,14 @@ class ResumeService:
             # - add the new info hash for our record
             # Further alerts (including torrent_removed_alert) won't match the
             # record, as we key records by the *combination* of hashes.
-            if not await asyncio.to_thread(
+            if not await concurrency.to_thread(
                 ltpy.handle_in_session, handle, self._session
             ):
                 return lambda conn: None
             try:
                 with ltpy.translate_exceptions():
                     # DOES block
-                    ti = await asyncio.to_thread(handle.torrent_file)
+                    ti = await concurrency.to_thread(handle.torrent_file)
             except ltpy.InvalidTorrentHandleError:
                 return lambda conn: None
             # metadata_received_alert is only emitted when we have the complete info
@@ -171,6 +213,39 @@ class ResumeService:
 
         self._queue.put_nowait(asyncio.create_task(maybe_update_info_hashes_and_info()))
 
+    def _save_resume_data(self, handle: lt.torrent_handle, *, flags: int) -> None:
+        # Every call that doesn't raise posts one save_resume_data_alert or
+        # save_resume_data_failed_alert. Count per handle, so alerts for saves
+        # that other code requested can't throw us off. A handle may have
+        # several saves outstanding, such as a periodic save racing one
+        # triggered by an alert
+        handle.save_resume_data(flags=flags)
+        self._pending_saves[handle] += 1
+        self._no_pending_saves.clear()
+
+    def _save_done(self, handle: lt.torrent_handle) -> None:
+        count = self._pending_saves[handle]
+        if count > 1:
+            self._pending_saves[handle] = count - 1
+        else:
+            self._saves_abandoned(handle)
+
+    def _saves_abandoned(self, handle: lt.torrent_handle) -> None:
+        self._pending_saves.pop(handle, None)
+        if not self._pending_saves:
+            self._no_pending_saves.set()
+
+    async def _wait_for_pending_saves(self) -> None:
+        try:
+            await asyncio.wait_for(self._no_pending_saves.wait(), self.TIMEOUT)
+        except asyncio.TimeoutError:
+            # Alerts may have been dropped, such as if the alert queue overflowed
+            _LOG.warning(
+                "shutdown: timed out waiting for resume data for %d torrents. "
+                "Resume data may be incomplete",
+                len(self._pending_saves),
+            )
+
     def _add(self, func: Callable[..., None], *args: Any) -> None:
         job = functools.partial(func, *args)
         self._queue.put_nowait(concurrency.create_future(job))
@@ -184,6 +259,8 @@ class ResumeService:
         periodic = asyncio.create_task(self._periodic_save_all())
         alert_handler = asyncio.create_task(self._handle_alerts())
         writer = asyncio.create_task(resumedb.write(self._pool, self._queue))
+        # Don't save anything before we can see the resulting alerts
+        await self._subscribed.wait()
 
         _LOG.info("ResumeService started")
         await self._closed
@@ -196,7 +273,8 @@ class ResumeService:
         # (storage_moved_alert, etc) to be received. That would require
         # tracking many calls like move_storage() across all code, and this may
         # expand to include other calls. I could not find a good approach to do
-        # this from python. For now, just wait for events with a timeout
+        # this from python. For now, wait until every save_resume_data() call
+        # we made has been answered, with a timeout
 
         # move_storage() across filesystems may take a long time, so don't
         # trust a short timeout. We *could* do this by waiting for alerts but
@@ -215,11 +293,7 @@ class ResumeService:
         await self._save_all_if_modified(flags=lt.save_resume_flags_t.flush_disk_cache)
 
         _LOG.info("shutdown: waiting for final resume data")
-        while True:
-            self._got_alert.clear()
-            await concurrency.wait_first([self._got_alert.wait(), asyncio.sleep(1)])
-            if not self._got_alert.is_set():
-                break
+        await self._wait_for_pending_saves()
 
         alert_handler.cancel()
 
@@ -250,20 +324,28 @@ class ResumeService:
         # scales, but I don't know of a better way to do this right now
         with ltpy.translate_exceptions():
             # DOES block
-            handles = await asyncio.to_thread(self._session.get_torrents)
-        # Dispatch need_save_resume_data() all at once
-        dispatch = [(h, asyncio.to_thread(h.need_save_resume_data)) for h in handles]
+            handles = await concurrency.to_thread(self._session.get_torrents)
         # We don't use save_resume_data(flags=only_if_modified), to avoid
         # overloading the alert queue
-        for handle, need_save_resume_data in dispatch:
-            with contextlib.suppress(ltpy.InvalidTorrentHandleError):
-                with ltpy.translate_exceptions():
-                    if await need_save_resume_data:
-                        handle.save_resume_data(flags=flags)
+        for i in range(0, len(handles), self.HANDLE_BATCH_SIZE):
+            batch = handles[i : i + self.HANDLE_BATCH_SIZE]
+            for handle in await concurrency.to_thread(
+                _filter_need_save_resume_data, batch
+            ):
+                with contextlib.suppress(ltpy.InvalidTorrentHandleError):
+                    with ltpy.translate_exceptions():
+                        self._save_resume_data(handle, flags=flags)
 
     async def _num_moving_storage(self) -> int:
         with ltpy.translate_exceptions():
             # DOES block
-            handles = await asyncio.to_thread(self._session.get_torrents)
-        statuses = await asyncio.gather(*[asyncio.to_thread(h.status) for h in handles])
-        return sum(status.moving_storage for status in statuses)
+            handles = await concurrency.to_thread(self._session.get_torrents)
+        counts = await asyncio.gather(
+            *[
+                concurrency.to_thread(
+                    _count_moving_storage, handles[i : i + self.HANDLE_BATCH_SIZE]
+                )
+                for i in range(0, len(handles), self.HANDLE_BATCH_SIZE)
+            ]
+        )
+        return sum(counts)
@@ -13,9 +13,9 @@
 
 from __future__ import annotations
 
-import asyncio
 from collections.abc import AsyncIterator
 from collections.abc import Iterator
+from collections.abc import Mapping
 from collections.abc import Sequence
 import logging
 from typing import Optional
@@ -26,12 +26,13 @@ import asyncstdlib
 import fastapi
 import libtorrent as lt
 from pydantic import NonNegativeInt
-from starlette.datastructures import Headers
-from starlette.datastructures import MutableHeaders
+import starlette.background
 import starlette.responses
 import starlette.types
 
 from .. import byteranges
+from .. import caches
+from .. import concurrency
 from .. import ltmodels
 from .. import ltpy
 from .. import services
@@ -57,7 +58,7 @@ class NotModifiedResponse(starlette.responses.Response):
         "vary",
     )
 
-    def __init__(self, headers: Headers) -> None:
+    def __init__(self, headers: Mapping[str, str]) -> None:
         super().__init__(
             status_code=304,
             headers={
@@ -88,7 +89,7 @@ class _Helper:
     @asyncstdlib.cached_property
     async def existing_handle(self) -> lt.torrent_handle:
         session = await services.get_session()
-        return await asyncio.to_thread(
+        return await concurrency.to_thread(
             session.find_torrent, self.info_hashes.get_best()
         )
 
@@ -97,7 +98,7 @@ class _Helper:
         handle = await self.existing_handle
         if not handle.is_valid():
             return None
-        return await asyncio.to_thread(handle.torrent_file)
+        return await concurrency.to_thread(handle.torrent_file)
 
     @asyncstdlib.cached_property
     async def torrent_info(self) -> lt.torrent_info:
@@ -128,35 +129,41 @@ class _Helper:
                 detail="file does not exist in torrent",
             )
 
-    @asyncstdlib.cached_property
-    async def configure_swarm(
-        self,
-    ) -> swarm.ConfigureSwarm:
-        name_to_configure_swarm = await swarm.get_name_to_configure_swarm(
-            self.info_hashes
-        )
-        if not name_to_configure_swarm:
-            raise fastapi.HTTPException(
-                status_code=fastapi.status.HTTP_404_NOT_FOUND,
-                detail="unknown torrent",
-            )
-        return list(name_to_configure_swarm.values())[0]
-
     @asyncstdlib.cached_property
     async def valid_handle(self) -> lt.torrent_handle:
         existing = await self.existing_handle
         if existing.is_valid():
             return existing
-        configure_swarm = await self.configure_swarm
-        atp = await atp_services.get_default()
-        atp.info_hashes = self.info_hashes
-        await configure_swarm(atp)
-        await atp_services.configure(atp)
-        atp.flags &= ~lt.torrent_flags.duplicate_is_error
-        session = await services.get_session()
-        # TODO: check against the requested network
-        with ltpy.translate_exceptions():
-            return await asyncio.to_thread(session.add_torrent, atp)  # type: ignore
+        return await _add_torrent(self.info_hashes)
+
+
+# Concurrent first requests for a torrent share one add, rather than each
+# configuring and adding it only for libtorrent to return the same handle
+@caches.singleflight()
+async def _add_torrent(info_hashes: lt.info_hash_t) -> lt.torrent_handle:
+    name_to_configure_swarm = await swarm.get_name_to_configure_swarm(info_hashes)
+    if not name_to_configure_swarm:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="unknown torrent",
+        )
+    configure_swarm = list(name_to_configure_swarm.values())[0]
+    atp = await atp_services.get_default()
+    atp.info_hashes = info_hashes
+    await configure_swarm(atp)
+    await atp_services.configure(atp)
+    atp.flags &= ~lt.torrent_flags.duplicate_is_error
+    session = await services.get_session()
+    # TODO: check against the requested network
+    with ltpy.translate_exceptions():
+        return await concurrency.to_thread(session.add_torrent, atp)
+
+
+# A file's bounds are fixed by the info hashes, so repeated (range) requests
+# for one file don't need to look up the handle or its metadata again
+@caches.alru_cache(maxsize=256)
+async def _get_bounds(info_hashes: lt.info_hash_t, file_index: int) -> tuple[int, int]:
+    return await _Helper(info_hashes, file_index).bounds
 
 
 @ROUTER.api_route("/btih/{info_hash}/i/{file_index}", methods=["GET", "HEAD"])
@@ -165,31 +172,32 @@ async def read_file(
     file_index: NonNegativeInt,
     request: fastapi.Request,
 ):
-    helper = _Helper(ltmodels.info_hashes_from_digest(info_hash), file_index)
+    info_hashes = ltmodels.info_hashes_from_digest(info_hash)
     # May add the torrent, to figure out bounds from its torrent_info
-    start, stop = await helper.bounds
+    start, stop = await _get_bounds(info_hashes, file_index)
     length = stop - start
 
     status_code = fastapi.status.HTTP_200_OK
     etag = f'"{info_hash.hex()}.{file_index}"'
-    headers = MutableHeaders(
-        {
-            "Content-Type": "application/octet-stream",
-            "Content-Length": str(length),
-            "Accept-Ranges": "bytes",
-            "etag": etag,
-            "cache-control": "public, immutable, max-age=31536000",
-        }
-    )
+    # Keys are all lowercase, so a plain dict can stand in for MutableHeaders
+    headers = {
+        "content-type": "application/octet-stream",
+        "content-length": str(length),
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "cache-control": "public, immutable, max-age=31536000",
+    }
 
     if request.headers.get("if-none-match", "") == etag:
         return NotModifiedResponse(headers)
 
     slices: Sequence[slice] = []
-    if "range" in request.headers:
+    range_header = request.headers.get("range")
+    # Other range units are ignored, so don't bother raising for them
+    if range_header is not None and range_header.startswith("bytes="):
         if request.headers.get("if-range", etag) == etag:
             try:
-                slices = byteranges.parse_bytes_range(request.headers["range"])
+                slices = byteranges.parse_bytes_range(range_header)
             except ValueError:
                 pass
     if len(slices) == 1:
@@ -199,7 +207,7 @@ async def read_file(
             headers["content-length"] = "0"
             raise fastapi.HTTPException(
                 status_code=416,
-                headers=dict(headers),
+                headers=headers,
                 detail="requested range does not overlap file bounds",
             )
         status_code = fastapi.status.HTTP_206_PARTIAL_CONTENT
@@ -209,14 +217,17 @@ async def read_file(
         start, stop = start + range_start, start + range_stop
 
     iterator: Union[AsyncIterator[bytes], Iterator[bytes]] = iter(())
+    background: Optional[starlette.background.BackgroundTask] = None
     if request.method == "GET":
-        # Will add the torrent if it hasn't been added yet
+        helper = _Helper(info_hashes, file_index)
+        # Will add the torrent if it hasn't been added yet. Resolve these
+        # sequentially, as cached_property may run a getter more than once if
+        # awaited concurrently, and torrent_info depends on valid_handle
+        handle = await helper.valid_handle
         piece_length = (await helper.torrent_info).piece_length()
         start_piece, stop_piece = util.range_to_pieces(piece_length, start, stop)
         request_service = await services.get_request_service()
-        pieces = request_service.read_pieces(
-            await helper.valid_handle, range(start_piece, stop_piece)
-        )
+        pieces = request_service.read_pieces(handle, range(start_piece, stop_piece))
 
         async def clamped_pieces() -> AsyncIterator[bytes]:
             offset = start_piece * piece_length
@@ -228,7 +239,11 @@ async def read_file(
                 offset += len(piece)
 
         iterator = clamped_pieces()
+        # If the client disconnects, StreamingResponse abandons the iterator
+        # while it's suspended, and nothing closes it until gc. Close it
+        # ourselves, to release our read requests and piece deadlines
+        background = starlette.background.BackgroundTask(pieces.aclose)
 
     return starlette.responses.StreamingResponse(
-        iterator, status_code=status_code, headers=dict(headers)
+        iterator, status_code=status_code, headers=headers, background=background
     )
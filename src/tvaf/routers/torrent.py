@@ -15,13 +15,14 @@ from __future__ import annotations
 
 import asyncio
 from collections.abc import Iterator
+from collections.abc import Sequence
 import contextlib
 import logging
 
-import anyio
 import fastapi
 import libtorrent as lt
 
+from .. import concurrency
 from .. import ltmodels
 from .. import ltpy
 from .. import services
@@ -33,7 +34,7 @@ _LOG = logging.getLogger(__name__)
 
 async def find_torrent_in(session: lt.session, info_hash: bytes) -> lt.torrent_handle:
     best = ltmodels.info_hashes_from_digest(info_hash).get_best()
-    return await asyncio.to_thread(session.find_torrent, best)
+    return await concurrency.to_thread(session.find_torrent, best)
 
 
 async def find_torrent(info_hash: bytes) -> lt.torrent_handle:
@@ -50,23 +51,36 @@ def translate_exceptions() -> Iterator[None]:
         raise fastapi.HTTPException(status_code=fastapi.status.HTTP_404_NOT_FOUND)
 
 
-@ROUTER.get("/")
-async def get_torrents() -> list[ltmodels.TorrentStatus]:
-    session = await services.get_session()
-    with ltpy.translate_exceptions():
-        handles = await asyncio.to_thread(session.get_torrents)
-    index_to_status_model: dict[int, ltmodels.TorrentStatus] = {}
+# Number of handles to query per executor job
+_STATUS_BATCH_SIZE = 64
+
 
-    async def fetch_one_status(index: int, handle: lt.torrent_handle) -> None:
+def _get_statuses(handles: Sequence[lt.torrent_handle]) -> list[lt.torrent_status]:
+    result: list[lt.torrent_status] = []
+    for handle in handles:
         with contextlib.suppress(ltpy.InvalidTorrentHandleError):
             with ltpy.translate_exceptions():
-                status = await asyncio.to_thread(handle.status, flags=0x7FFFFFFF)
-        index_to_status_model[index] = ltmodels.TorrentStatus.from_orm(status)
+                # DOES block
+                result.append(handle.status(flags=0x7FFFFFFF))
+    return result
 
-    async with anyio.create_task_group() as tasks:
-        for index, handle in enumerate(handles):
-            tasks.start_soon(fetch_one_status, index, handle)
-    return [status for _, status in sorted(index_to_status_model.items())]
+
+@ROUTER.get("/")
+async def get_torrents() -> list[ltmodels.TorrentStatus]:
+    session = await services.get_session()
+    with ltpy.translate_exceptions():
+        handles = await concurrency.to_thread(session.get_torrents)
+    # One executor job per batch rather than per handle. Each status() call
+    # round-trips to the session thread anyway, so more jobs don't add much
+    batches = await asyncio.gather(
+        *[
+            concurrency.to_thread(_get_statuses, handles[i : i + _STATUS_BATCH_SIZE])
+            for i in range(0, len(handles), _STATUS_BATCH_SIZE)
+        ]
+    )
+    return [
+        ltmodels.TorrentStatus.from_orm(status) for batch in batches for status in batch
+    ]
 
 
 @ROUTER.get("/{info_hash}")
@@ -74,7 +88,7 @@ async def status(info_hash: ltmodels.Hex160) -> ltmodels.TorrentStatus:
     handle = await find_torrent(info_hash)
     with translate_exceptions():
         return ltmodels.TorrentStatus.from_orm(
-            await asyncio.to_thread(handle.status, flags=0x7FFFFF)
+            await concurrency.to_thread(handle.status, flags=0x7FFFFF)
         )
 
 
@@ -84,7 +98,7 @@ async def get_piece_priorities(
 ) -> list[int]:
     handle = await find_torrent(info_hash)
     with translate_exceptions():
-        return await asyncio.to_thread(handle.get_piece_priorities)
+        return await concurrency.to_thread(handle.get_piece_priorities)
 
 
 @ROUTER.delete("/{info_hash}")
@@ -32,6 +32,7 @@ import libtorrent as lt
 from tvaf import caches
 from tvaf._internal import main
 
+from .. import concurrency
 from .. import config as config_lib
 from .. import driver as driver_lib
 from .. import plugins
@@ -51,7 +52,7 @@ startup_plugin = _STARTUP_FUNCS.decorator
 
 
 async def do_startup() -> None:
-    for _, func in sorted(_STARTUP_FUNCS.get().items()):
+    for func in _STARTUP_FUNCS.get().values():
         await func()
 
 
@@ -61,7 +62,7 @@ shutdown_plugin = _SHUTDOWN_FUNCS.decorator
 
 
 async def do_shutdown() -> None:
-    for _, func in sorted(_SHUTDOWN_FUNCS.get().items()):
+    for func in _SHUTDOWN_FUNCS.get().values():
         await func()
 
 
@@ -114,7 +115,7 @@ stage_config_plugin = _STAGE_CONFIG_FUNCS.decorator
 
 
 def stage_config(config: config_lib.Config) -> AsyncContextManager[None]:
-    stages = [func for _, func in sorted(_STAGE_CONFIG_FUNCS.get().items())]
+    stages = list(_STAGE_CONFIG_FUNCS.get().values())
     return config_lib.stage_config(config, *stages)
 
 
@@ -196,13 +197,13 @@ async def _stage_config_disk(config: config_lib.Config) -> AsyncIterator[None]:
     try:
         yield
         try:
-            await asyncio.to_thread(tmp_path.replace, CONFIG_PATH)
+            await concurrency.to_thread(tmp_path.replace, CONFIG_PATH)
             _LOG.info("config: wrote %s", CONFIG_PATH.resolve())
         except OSError:
             _LOG.exception("couldn't write %s", CONFIG_PATH.resolve())
     finally:
         try:
-            await asyncio.to_thread(tmp_path.unlink)
+            await concurrency.to_thread(tmp_path.unlink)
         except FileNotFoundError:
             pass
         except OSError:
@@ -228,6 +229,11 @@ async def _stage_config_session_service(
         yield
 
 
+@startup_plugin("00_executor")
+async def _startup_executor() -> None:
+    concurrency.start_thread_pool()
+
+
 @startup_plugin("20_alert")
 async def _startup_alert_driver() -> None:
     start_soon_from_main((await get_alert_driver()).run)
@@ -275,6 +281,16 @@ async def _shutdown_alert_driver() -> None:
     (await get_alert_driver()).shutdown()
 
 
+@shutdown_plugin("95_process_pool")
+async def _shutdown_process_pool() -> None:
+    await concurrency.to_thread(concurrency.shutdown_process_pool)
+
+
+@shutdown_plugin("96_thread_pool")
+async def _shutdown_thread_pool() -> None:
+    concurrency.shutdown_thread_pool()
+
+
 @shutdown_plugin("98_clear")
 async def _shutdown_clear_caches() -> None:
     caches.clear_all()
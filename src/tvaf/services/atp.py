@@ -13,7 +13,6 @@
 
 from __future__ import annotations
 
-import asyncio
 from collections.abc import AsyncIterator
 from collections.abc import Awaitable
 import contextlib
@@ -26,6 +25,7 @@ import libtorrent as lt
 
 from tvaf import caches
 
+from .. import concurrency
 from .. import config as config_lib
 from .. import plugins
 from .. import services
@@ -41,7 +41,7 @@ default_plugin = _DEFAULT_FUNCS.decorator
 
 async def get_default() -> lt.add_torrent_params:
     atp = lt.add_torrent_params()
-    for _, func in sorted(_DEFAULT_FUNCS.get().items()):
+    for func in _DEFAULT_FUNCS.get().values():
         await func(atp)
     return atp
 
@@ -54,7 +54,7 @@ configure_plugin = _CONFIGURE_FUNCS.decorator
 
 
 async def configure(atp: lt.add_torrent_params) -> None:
-    for _, func in sorted(_CONFIGURE_FUNCS.get().items()):
+    for func in _CONFIGURE_FUNCS.get().values():
         await func(atp)
 
 
@@ -68,7 +68,7 @@ async def _get_defaults_from_config(
     save_path = pathlib.Path(config.require_str("torrent_default_save_path"))
     try:
         # Raises RuntimeError on symlink loops
-        save_path = await asyncio.to_thread(save_path.resolve)
+        save_path = await concurrency.to_thread(save_path.resolve)
     except RuntimeError as exc:
         raise config_lib.InvalidConfigError(str(exc)) from exc
 
@@ -20,6 +20,7 @@ import anyio
 import libtorrent as lt
 
 from tvaf import caches
+from tvaf import concurrency
 from tvaf import driver as driver_lib
 
 from .. import ltpy
@@ -34,7 +35,7 @@ async def get_torrent_info(
 ) -> lt.torrent_info:
     async def get() -> Optional[lt.torrent_info]:
         with ltpy.translate_exceptions():
-            return await asyncio.to_thread(handle.torrent_file)
+            return await concurrency.to_thread(handle.torrent_file)
 
     async with iter_alerts(
         lt.alert_category.status,
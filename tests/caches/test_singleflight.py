@@ -0,0 +1,144 @@
+# Copyright (c) 2022 AllSeeingEyeTolledEweSew
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT,
+# INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM
+# LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR
+# OTHER TORTIOUS ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR
+# PERFORMANCE OF THIS SOFTWARE.
+
+import asyncio
+import gc
+from typing import Any
+
+import pytest
+
+from tests import conftest
+from tvaf import caches
+
+
+class DummyException(Exception):
+    pass
+
+
+@conftest.timeout(60)
+async def test_concurrent_calls_shared() -> None:
+    calls: list[int] = []
+    release = asyncio.get_event_loop().create_future()
+
+    @caches.singleflight()
+    async def func(value: int) -> int:
+        calls.append(value)
+        await release
+        return value
+
+    first = asyncio.create_task(func(1))
+    second = asyncio.create_task(func(1))
+    other = asyncio.create_task(func(2))
+    await asyncio.sleep(0)
+    release.set_result(None)
+    assert await asyncio.gather(first, second, other) == [1, 1, 2]
+    assert sorted(calls) == [1, 2]
+
+
+@conftest.timeout(60)
+async def test_result_not_cached() -> None:
+    calls = 0
+
+    @caches.singleflight()
+    async def func() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await func() == 1
+    assert await func() == 2
+
+
+@conftest.timeout(60)
+async def test_kwargs_distinct_from_args() -> None:
+    @caches.singleflight()
+    async def func(*args: int, **kwargs: int) -> tuple:
+        return (args, kwargs)
+
+    results = await asyncio.gather(func(1), func(a=1))
+    assert results == [((1,), {}), ((), {"a": 1})]
+
+
+@conftest.timeout(60)
+async def test_exception_shared_and_not_cached() -> None:
+    calls = 0
+    release = asyncio.get_event_loop().create_future()
+
+    @caches.singleflight()
+    async def func() -> None:
+        nonlocal calls
+        calls += 1
+        await release
+        raise DummyException()
+
+    first = asyncio.create_task(func())
+    second = asyncio.create_task(func())
+    await asyncio.sleep(0)
+    release.set_result(None)
+    for task in (first, second):
+        with pytest.raises(DummyException):
+            await task
+    assert calls == 1
+    with pytest.raises(DummyException):
+        await func()
+    assert calls == 2
+
+
+@conftest.timeout(60)
+async def test_cancel_one_caller() -> None:
+    release = asyncio.get_event_loop().create_future()
+
+    @caches.singleflight()
+    async def func() -> int:
+        await release
+        return 1
+
+    first = asyncio.create_task(func())
+    second = asyncio.create_task(func())
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set_result(None)
+    assert await second == 1
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@conftest.timeout(60)
+async def test_cancel_all_callers_with_exception() -> None:
+    loop = asyncio.get_event_loop()
+    release = loop.create_future()
+    done = loop.create_future()
+    contexts: list[dict[str, Any]] = []
+    loop.set_exception_handler(lambda _, context: contexts.append(context))
+
+    @caches.singleflight()
+    async def func() -> None:
+        try:
+            await release
+            raise DummyException()
+        finally:
+            done.set_result(None)
+
+    first = asyncio.create_task(func())
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    release.set_result(None)
+    await done
+    # Let the call's task finish
+    await asyncio.sleep(0)
+    # An unretrieved exception would be reported on garbage collection
+    gc.collect()
+    loop.set_exception_handler(None)
+    assert contexts == []
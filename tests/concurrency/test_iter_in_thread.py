@@ -12,7 +12,11 @@
 # PERFORMANCE OF THIS SOFTWARE.
 
 from collections.abc import Iterator
+import math
 import threading
+import time
+from typing import Any
+from typing import Callable
 
 import asyncstdlib
 import pytest
@@ -24,6 +28,22 @@ class DummyException(Exception):
     pass
 
 
+@pytest.fixture
+def batch_sizes(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    # Records the size of each batch, one per executor round-trip
+    sizes: list[int] = []
+    to_thread = concurrency.to_thread
+
+    async def counting_to_thread(func: Callable[..., Any], /, *args: Any) -> Any:
+        result = await to_thread(func, *args)
+        batch, _ = result
+        sizes.append(len(batch))
+        return result
+
+    monkeypatch.setattr(concurrency, "to_thread", counting_to_thread)
+    return sizes
+
+
 async def test_return_value() -> None:
     def iterator() -> Iterator[int]:
         yield 1
@@ -74,3 +94,39 @@ async def test_large_batch_size() -> None:
         concurrency.iter_in_thread(iterator(), batch_size=1000000)
     )
     assert values == [1]
+
+
+async def test_adaptive_batch_size(
+    batch_sizes: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Treat every batch as fast, regardless of machine load
+    monkeypatch.setattr(concurrency, "_ADAPTIVE_FAST_BATCH_SECONDS", math.inf)
+
+    def iterator() -> Iterator[int]:
+        yield from range(100000)
+
+    values = await asyncstdlib.list(
+        concurrency.iter_in_thread(iterator(), batch_size=None)
+    )
+    assert values == list(range(100000))
+    # Fast batches should double, up to the maximum
+    growing = [100, 200, 400, 800, 1600, 3200, 6400]
+    assert batch_sizes == growing + [10000] * 8 + [7300, 0]
+
+
+async def test_adaptive_batch_size_slow(
+    batch_sizes: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(concurrency, "_ADAPTIVE_INITIAL_BATCH_SIZE", 4)
+
+    def iterator() -> Iterator[int]:
+        for i in range(10):
+            time.sleep(0.03)
+            yield i
+
+    values = await asyncstdlib.list(
+        concurrency.iter_in_thread(iterator(), batch_size=None)
+    )
+    assert values == list(range(10))
+    # Slow batches should shrink, down to 1
+    assert batch_sizes == [4, 2, 1, 1, 1, 1, 0]
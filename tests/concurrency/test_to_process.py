@@ -0,0 +1,37 @@
+# Copyright (c) 2022 AllSeeingEyeTolledEweSew
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT,
+# INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM
+# LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR
+# OTHER TORTIOUS ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR
+# PERFORMANCE OF THIS SOFTWARE.
+
+from collections.abc import Iterator
+import operator
+import os
+
+import pytest
+
+from tests import conftest
+from tvaf import concurrency
+
+
+@pytest.fixture(autouse=True)
+def process_pool() -> Iterator[None]:
+    yield
+    concurrency.shutdown_process_pool()
+
+
+@conftest.timeout(60)
+async def test_return_value() -> None:
+    assert await concurrency.to_process(operator.add, 1, 2) == 3
+
+
+@conftest.timeout(60)
+async def test_really_in_process() -> None:
+    assert await concurrency.to_process(os.getpid) != os.getpid()
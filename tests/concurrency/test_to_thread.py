@@ -0,0 +1,66 @@
+# Copyright (c) 2022 AllSeeingEyeTolledEweSew
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT,
+# INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM
+# LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR
+# OTHER TORTIOUS ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR
+# PERFORMANCE OF THIS SOFTWARE.
+
+import concurrent.futures
+import contextvars
+import threading
+
+from tvaf import concurrency
+
+_VAR: contextvars.ContextVar[str] = contextvars.ContextVar("_VAR", default="default")
+
+
+async def test_positional_args() -> None:
+    def sub(a: int, b: int) -> int:
+        return a - b
+
+    assert await concurrency.to_thread(sub, 3, 1) == 2
+
+
+async def test_keyword_args() -> None:
+    def sub(a: int, b: int) -> int:
+        return a - b
+
+    assert await concurrency.to_thread(sub, 3, b=1) == 2
+
+
+async def test_really_in_thread() -> None:
+    inside_id = await concurrency.to_thread(threading.get_ident)
+    assert inside_id != threading.get_ident()
+
+
+async def test_context_copied() -> None:
+    _VAR.set("set")
+    assert await concurrency.to_thread(_VAR.get) == "set"
+
+
+async def test_executor() -> None:
+    with concurrent.futures.ThreadPoolExecutor(
+        thread_name_prefix="test-executor"
+    ) as executor:
+        name = await concurrency.to_thread(
+            lambda: threading.current_thread().name, executor=executor
+        )
+    assert name.startswith("test-executor")
+
+
+async def test_thread_pool() -> None:
+    concurrency.start_thread_pool()
+    try:
+        name = await concurrency.to_thread(lambda: threading.current_thread().name)
+        assert name.startswith("tvaf")
+    finally:
+        concurrency.shutdown_thread_pool()
+    # Falls back to the event loop's default executor
+    name = await concurrency.to_thread(lambda: threading.current_thread().name)
+    assert not name.startswith("tvaf")
@@ -0,0 +1,36 @@
+# Copyright (c) 2022 AllSeeingEyeTolledEweSew
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT,
+# INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM
+# LOSS OF USE, DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR
+# OTHER TORTIOUS ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR
+# PERFORMANCE OF THIS SOFTWARE.
+
+import contextvars
+import threading
+
+from tvaf import concurrency
+
+_VAR: contextvars.ContextVar[str] = contextvars.ContextVar("_VAR", default="default")
+
+
+async def test_return_value() -> None:
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    assert await concurrency.to_thread_nocontext(add, 1, 2) == 3
+
+
+async def test_really_in_thread() -> None:
+    inside_id = await concurrency.to_thread_nocontext(threading.get_ident)
+    assert inside_id != threading.get_ident()
+
+
+async def test_context_not_copied() -> None:
+    _VAR.set("set")
+    assert await concurrency.to_thread_nocontext(_VAR.get) == "default"
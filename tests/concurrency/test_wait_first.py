@@ -12,6 +12,7 @@
 # PERFORMANCE OF THIS SOFTWARE.
 
 import asyncio
+import gc
 
 import pytest
 
@@ -60,3 +61,41 @@ async def test_cancel() -> None:
         await concurrency.wait_first((forever, cancel_task(current_task)))
     assert forever.done()
     assert forever.cancelled()
+
+
+@conftest.timeout(60)
+async def test_pending_cleanup_finished() -> None:
+    cleaned_up = False
+
+    async def noop() -> None:
+        pass
+
+    async def cleanup_on_cancel() -> None:
+        nonlocal cleaned_up
+        try:
+            await asyncio.get_event_loop().create_future()
+        finally:
+            await asyncio.sleep(0)
+            cleaned_up = True
+
+    await concurrency.wait_first((noop(), cleanup_on_cancel()))
+    assert cleaned_up
+
+
+@conftest.timeout(60)
+async def test_simultaneous_exceptions() -> None:
+    loop = asyncio.get_event_loop()
+    contexts: list[dict] = []
+    loop.set_exception_handler(lambda _, context: contexts.append(context))
+    try:
+        first = loop.create_future()
+        second = loop.create_future()
+        first.set_exception(DummyException())
+        second.set_exception(DummyException())
+        with pytest.raises(DummyException):
+            await concurrency.wait_first((first, second))
+        del first, second
+        gc.collect()
+    finally:
+        loop.set_exception_handler(None)
+    assert contexts == []
@@ -113,3 +113,19 @@ def test_require_bool_invalid() -> None:
     config = config_lib.Config(key=1)
     with pytest.raises(config_lib.InvalidConfigError):
         config.require_bool("key")
+
+
+def test_get_int_null() -> None:
+    config = config_lib.Config(key=None)
+    with pytest.raises(config_lib.InvalidConfigError):
+        config.get_int("key")
+
+
+def test_get_bool_false() -> None:
+    config = config_lib.Config(key=False)
+    assert config.get_bool("key") is False
+
+
+def test_require_bool_false() -> None:
+    config = config_lib.Config(key=False)
+    assert config.require_bool("key") is False
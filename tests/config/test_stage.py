@@ -11,11 +11,15 @@
 # OTHER TORTIOUS ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR
 # PERFORMANCE OF THIS SOFTWARE.
 
+import asyncio
 from collections.abc import AsyncIterator
 import contextlib
+from typing import AsyncContextManager
+from typing import Callable
 
 import pytest
 
+from tests import conftest
 from tvaf import config as config_lib
 
 
@@ -87,3 +91,62 @@ async def test_success() -> None:
 
     assert receiver1.config == config
     assert receiver2.config == config
+
+
+async def test_parallel_fail() -> None:
+    config = config_lib.Config(new=True)
+
+    good_receiver = Receiver()
+    fail_receiver = FailReceiver()
+
+    with pytest.raises(DummyException):
+        async with config_lib.stage_config(
+            config,
+            good_receiver.stage_config,
+            fail_receiver.stage_config,
+            parallel=True,
+        ):
+            pass
+
+    assert good_receiver.config == config_lib.Config()
+
+
+async def test_parallel_success() -> None:
+    config = config_lib.Config(new=True)
+
+    receiver1 = Receiver()
+    receiver2 = Receiver()
+
+    async with config_lib.stage_config(
+        config, receiver1.stage_config, receiver2.stage_config, parallel=True
+    ):
+        pass
+
+    assert receiver1.config == config
+    assert receiver2.config == config
+
+
+@conftest.timeout(60)
+async def test_parallel_enters_concurrently() -> None:
+    # Each stage waits for the other to start entering, which would deadlock
+    # if they were entered serially
+    events = (asyncio.Event(), asyncio.Event())
+
+    def make_stage(
+        mine: asyncio.Event, other: asyncio.Event
+    ) -> Callable[[config_lib.Config], AsyncContextManager]:
+        @contextlib.asynccontextmanager
+        async def stage(_config: config_lib.Config) -> AsyncIterator[None]:
+            mine.set()
+            await other.wait()
+            yield
+
+        return stage
+
+    async with config_lib.stage_config(
+        config_lib.Config(),
+        make_stage(events[0], events[1]),
+        make_stage(events[1], events[0]),
+        parallel=True,
+    ):
+        pass
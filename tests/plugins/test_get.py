@@ -11,6 +11,8 @@
 # OTHER TORTIOUS ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR
 # PERFORMANCE OF THIS SOFTWARE.
 
+import pytest
+
 from tests import epfake
 from tvaf import plugins
 
@@ -36,3 +38,16 @@ def test_get(entry_point_faker: epfake.EntryPointFaker) -> None:
     plugin_map = plugins.get("test")
 
     assert plugin_map == {"a": return_a, "b": return_b}
+
+
+def test_get_sorted_and_read_only(
+    entry_point_faker: epfake.EntryPointFaker,
+) -> None:
+    entry_point_faker.add("b", return_b, "test_sorted")
+    entry_point_faker.add("a", return_a, "test_sorted")
+
+    plugin_map = plugins.get("test_sorted")
+
+    assert list(plugin_map) == ["a", "b"]
+    with pytest.raises(TypeError):
+        plugin_map["c"] = return_a  # type: ignore[index]
@@ -76,3 +76,14 @@ def test_update(atp: lt.add_torrent_params, conn: apsw.Connection) -> None:
     assert got.save_path == "updated"
     assert resumedb.info_hashes(got) == resumedb.info_hashes(atp)
     assert_ti_equal(got.ti, atp.ti)
+
+
+def test_atp_unchanged(atp: lt.add_torrent_params, conn: apsw.Connection) -> None:
+    resumedb.insert_or_ignore_resume_data(atp, conn)
+    ti = atp.ti
+    info_hashes = atp.info_hashes
+
+    resumedb.update_resume_data(atp, conn)
+
+    assert atp.info_hashes == info_hashes
+    assert_ti_equal(atp.ti, ti)
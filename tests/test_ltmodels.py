@@ -18,6 +18,7 @@ import base64
 import datetime
 import errno
 import json
+from typing import Optional
 import unittest
 
 import libtorrent as lt
@@ -51,6 +52,7 @@ class Sha1HashTest(unittest.TestCase):
         sha1 = lt.sha1_hash(b"\xaa" * 20)
         model = self.Model(sha1=sha1)
         self.assertEqual(model.sha1, "aa" * 20)
+        self.assertIs(type(model.sha1), str)
 
     def test_lower(self) -> None:
         model = self.Model(sha1="AA" * 20)
@@ -73,6 +75,7 @@ class Sha256HashTest(unittest.TestCase):
         sha256 = lt.sha256_hash(b"\xaa" * 32)
         model = self.Model(sha256=sha256)
         self.assertEqual(model.sha256, "aa" * 32)
+        self.assertIs(type(model.sha256), str)
 
     def test_lower(self) -> None:
         model = self.Model(sha256="AA" * 32)
@@ -129,6 +132,54 @@ class Base64Test(unittest.TestCase):
         self.assertEqual(model, self.Model(base64=b"abc123\xff"))
 
 
+class SeqToBitfieldTest(unittest.TestCase):
+    CASES: tuple[tuple[list[bool], bytes], ...] = (
+        ([], b""),
+        ([True], b"\x80"),
+        ([False] * 8, b"\x00"),
+        ([True] * 8, b"\xff"),
+        ([True, False] * 5, b"\xaa\x80"),
+        ([False] * 9 + [True], b"\x00\x40"),
+        ([False] * 20, b"\x00\x00\x00"),
+        ([True] * 20, b"\xff\xff\xf0"),
+        ([True] * 15, b"\xff\xfe"),
+    )
+
+    def test_seq_to_bitfield(self) -> None:
+        for seq, expected in self.CASES:
+            with self.subTest(seq=seq):
+                self.assertEqual(ltmodels._seq_to_bitfield(seq), expected)
+
+
+class PiecesTest(unittest.TestCase):
+    class Model(ltmodels.BaseModel):
+        pieces: Optional[ltmodels._Pieces]
+
+    def test_seq(self) -> None:
+        model = self.Model(pieces=[True, False])
+        self.assertEqual(model.pieces, b"\x80")
+        self.assertEqual(json.loads(model.json()), {"pieces": "gA=="})
+
+    def test_empty(self) -> None:
+        model = self.Model(pieces=[])
+        self.assertIsNone(model.pieces)
+        # Only an empty list means "no pieces"; other empty sequences pack
+        # to an empty bitfield, as they always have
+        self.assertEqual(self.Model(pieces=()).pieces, b"")
+
+    def test_packed(self) -> None:
+        for value in (b"\x80", bytearray(b"\x80"), memoryview(b"\x80")):
+            with self.subTest(value=value):
+                model = self.Model(pieces=value)
+                self.assertEqual(model.pieces, b"\x80")
+                self.assertIs(type(model.pieces), bytes)
+        self.assertIsNone(self.Model(pieces=b"").pieces)
+
+    def test_invalid(self) -> None:
+        with self.assertRaises(pydantic.ValidationError):
+            self.Model(pieces="gA==")
+
+
 class TorrentStatusTest(lib.AppTestWithTorrent, lib.TestCase):
     @unittest.skip("flaky")
     async def test_status(self) -> None:
@@ -20,6 +20,7 @@ import tempfile
 from typing import Any
 from typing import cast
 import unittest
+from unittest import mock
 
 import anyio
 import apsw
@@ -196,6 +197,70 @@ class TerminateTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(atps, [])
 
 
+class PendingSavesTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.resume = resume_lib.ResumeService(
+            session=mock.Mock(), alert_driver=mock.Mock(), pool=mock.Mock()
+        )
+        self.resume.TIMEOUT = 0.1
+        self.handle = mock.Mock()
+
+    def alert(self, cls: type, handle: Any) -> Any:
+        return mock.Mock(spec=cls, handle=handle)
+
+    async def test_failed_save(self) -> None:
+        self.resume._save_resume_data(self.handle, flags=0)
+        self.handle.save_resume_data.assert_called_once_with(flags=0)
+
+        self.resume._handle_alert(
+            self.alert(lt.save_resume_data_failed_alert, self.handle)
+        )
+
+        with mock.patch.object(resume_lib._LOG, "warning") as warning:
+            await asyncio.wait_for(self.resume._wait_for_pending_saves(), 60)
+        warning.assert_not_called()
+
+    async def test_two_saves_same_handle(self) -> None:
+        self.resume._save_resume_data(self.handle, flags=0)
+        self.resume._save_resume_data(self.handle, flags=0)
+
+        # One save finishing shouldn't hide the other
+        self.resume._handle_alert(
+            self.alert(lt.save_resume_data_failed_alert, self.handle)
+        )
+
+        with self.assertLogs("tvaf.resume", level="WARNING"):
+            await asyncio.wait_for(self.resume._wait_for_pending_saves(), 60)
+
+    async def test_removed(self) -> None:
+        self.resume._save_resume_data(self.handle, flags=0)
+        self.resume._save_resume_data(self.handle, flags=0)
+
+        self.resume._handle_alert(self.alert(lt.torrent_removed_alert, self.handle))
+
+        with mock.patch.object(resume_lib._LOG, "warning") as warning:
+            await asyncio.wait_for(self.resume._wait_for_pending_saves(), 60)
+        warning.assert_not_called()
+
+    async def test_other_save(self) -> None:
+        self.resume._save_resume_data(self.handle, flags=0)
+
+        # Someone else's save shouldn't count against ours
+        self.resume._handle_alert(
+            self.alert(lt.save_resume_data_failed_alert, mock.Mock())
+        )
+
+        with self.assertLogs("tvaf.resume", level="WARNING"):
+            await asyncio.wait_for(self.resume._wait_for_pending_saves(), 60)
+
+    async def test_timeout(self) -> None:
+        self.resume._save_resume_data(self.handle, flags=0)
+
+        with self.assertLogs("tvaf.resume", level="WARNING") as logs:
+            await asyncio.wait_for(self.resume._wait_for_pending_saves(), 60)
+        self.assertIn("resume data for 1 torrents", logs.output[0])
+
+
 # TODO: test underflow, with and without pedantic
 
 # TODO: test magnets